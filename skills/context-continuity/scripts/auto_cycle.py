@@ -146,9 +146,9 @@ def run_cycle(
     prev_fp = str(state.get("fingerprint") or "")
     changed = force or (fp.get("fingerprint") != prev_fp)
 
-    # Verify integrity every cycle.
+    # Verify integrity every cycle; --full so edits inside the checkpointed prefix are caught too.
     v_rc, v_out, v_err = run_cmd(
-        ["python3", str(scripts_dir / "verify_memory.py"), "--repo", str(repo_root), "--strict"]
+        ["python3", str(scripts_dir / "verify_memory.py"), "--repo", str(repo_root), "--strict", "--full"]
     )
     if v_rc != 0:
         append_event(
@@ -12,10 +12,30 @@ import uuid
 from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 import fcntl
 
+try:
+    import orjson
+except ImportError:  # optional accelerator; stdlib json also parses bytes
+    orjson = None
+
+if orjson is not None:
+
+    def json_loads(data: bytes | str) -> Any:
+        """Parse with orjson, retrying with stdlib json on what it rejects (NaN, Infinity).
+
+        Readers only: output bytes must not depend on whether orjson is installed.
+        """
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+
+else:
+    json_loads = json.loads
+
 
 def codex_home() -> Path:
     env = os.environ.get("CODEX_HOME")
@@ -82,24 +102,78 @@ def ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
+def utc_iso(dt: datetime) -> str:
+    return dt.isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
 def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+    return utc_iso(datetime.now(timezone.utc))
 
 
 def stable_json(obj: dict[str, Any]) -> str:
     return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
 
 
+def hash_event_bytes(canonical: bytes) -> str:
+    return hashlib.sha256(canonical).hexdigest()
+
+
 def hash_event(payload_without_hash: dict[str, Any]) -> str:
-    return hashlib.sha256(stable_json(payload_without_hash).encode("utf-8")).hexdigest()
+    return hash_event_bytes(stable_json(payload_without_hash).encode("utf-8"))
 
 
-def append_jsonl(path: Path, obj: dict[str, Any]) -> None:
+def encode_event(payload_without_hash: dict[str, Any]) -> tuple[str, bytes]:
+    """Return ``(hash, jsonl_line)`` for an event, serializing it only once.
+
+    The line is the canonical JSON that was hashed with the ``hash`` field
+    appended as the last key, terminated by a newline.
+    """
+    canonical = stable_json(payload_without_hash).encode("utf-8")
+    event_hash = hash_event_bytes(canonical)
+    sep = b"," if len(canonical) > 2 else b""
+    return event_hash, canonical[:-1] + sep + b'"hash":"' + event_hash.encode("ascii") + b'"}\n'
+
+
+def atomic_write_files(files: list[tuple[Path, bytes]]) -> None:
+    """Write and fsync each file to a per-process temp sibling, then rename them into place in order.
+
+    Readers see either the old or the new content of each file, never a partial write.
+    """
+    staged: list[tuple[Path, Path]] = []
+    try:
+        for path, data in files:
+            ensure_dir(path.parent)
+            tmp = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+            staged.append((tmp, path))
+            with tmp.open("wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        for tmp, path in staged:
+            os.replace(tmp, path)
+    except BaseException:
+        for tmp, _path in staged:
+            tmp.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    atomic_write_files([(path, data)])
+
+
+def _append_line(path: Path, line: bytes) -> tuple[os.stat_result, os.stat_result]:
+    """Append `line` durably; returns the file's stat from just before and just after the write."""
     ensure_dir(path.parent)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(stable_json(obj) + "\n")
+    with path.open("ab") as f:
+        before = os.fstat(f.fileno())
+        f.write(line)
         f.flush()
         os.fsync(f.fileno())
+        return before, os.fstat(f.fileno())
+
+
+def append_jsonl(path: Path, obj: dict[str, Any]) -> None:
+    _append_line(path, (stable_json(obj) + "\n").encode("utf-8"))
 
 
 @contextmanager
@@ -114,23 +188,38 @@ def event_file_lock(events_path: Path):
             fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
 
 
-def read_last_jsonl_obj(path: Path) -> dict[str, Any] | None:
-    if not path.exists():
-        return None
-    last = ""
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                last = line
+def _read_last_obj(f: BinaryIO) -> dict[str, Any] | None:
+    end = f.seek(0, os.SEEK_END)
+    window = 64 * 1024
+    while True:
+        start = max(0, end - window)
+        f.seek(start)
+        tail = f.read(end - start).rstrip()
+        nl = tail.rfind(b"\n")
+        # Stop once the whole last line is inside the window.
+        if nl >= 0 or start == 0:
+            break
+        window *= 2
+    last = tail[nl + 1 :]
     if not last:
         return None
     try:
+        # Stdlib on purpose: the chain writer must read back anything stable_json
+        # wrote, including NaN and integers wider than 64 bits.
         loaded = json.loads(last)
-    except json.JSONDecodeError:
+    except ValueError:
         return None
     return loaded if isinstance(loaded, dict) else None
 
 
+def read_last_jsonl_obj(path: Path) -> dict[str, Any] | None:
+    """Parse the last non-blank line, reading backwards from the end of the file."""
+    if not path.exists():
+        return None
+    with path.open("rb") as f:
+        return _read_last_obj(f)
+
+
 def unique_keep_order(items: list[str]) -> list[str]:
     seen: set[str] = set()
     out: list[str] = []
@@ -152,11 +241,108 @@ def slugify(text: str) -> str:
     return value or "entry"
 
 
+_READ_CHUNK = 1 << 20
+_NONBLANK_LINE_RE = re.compile(rb"^[ \t\r\f\v]*\S", re.MULTILINE)
+
+
+def _count_nonempty(f: BinaryIO) -> int:
+    count = 0
+    carry = b""
+    while chunk := f.read(_READ_CHUNK):
+        first = chunk.find(b"\n")
+        if first < 0:
+            carry += chunk
+            continue
+        # The line straddling the previous chunk boundary is checked on its own.
+        if (carry + chunk[:first]).strip():
+            count += 1
+        last = chunk.rfind(b"\n")
+        count += len(_NONBLANK_LINE_RE.findall(chunk, first + 1, last + 1))
+        carry = chunk[last + 1 :]
+    if carry.strip():
+        count += 1
+    return count
+
+
 def count_nonempty_lines(path: Path) -> int:
+    """Count non-blank lines reading raw 1 MiB chunks; no per-line Python loop or decode."""
     if not path.exists():
         return 0
-    with path.open("r", encoding="utf-8") as f:
-        return sum(1 for line in f if line.strip())
+    with path.open("rb") as f:
+        return _count_nonempty(f)
+
+
+def jsonl_summary(path: Path) -> tuple[int, dict[str, Any] | None]:
+    """Return (non-blank line count, last object) using a single open of the file.
+
+    The tail read after the counting pass is served from the same handle and
+    the just-populated page cache.
+    """
+    if not path.exists():
+        return 0, None
+    with path.open("rb") as f:
+        count = _count_nonempty(f)
+        return count, _read_last_obj(f)
+
+
+def _new_event(
+    last_event: dict[str, Any] | None,
+    events_path: Path,
+    *,
+    repo_root: Path,
+    repo_id_value: str,
+    kind: str,
+    status: str,
+    summary: str,
+    source: str = "manual",
+    task: str | None = None,
+    paths: list[str] | None = None,
+    symbols: list[str] | None = None,
+    commands: list[str] | None = None,
+    refs: list[str] | None = None,
+    payload: dict[str, Any] | None = None,
+) -> tuple[dict[str, Any], bytes]:
+    """Build the event chained after `last_event`; returns it with its encoded line."""
+    prev_hash = (
+        str(last_event.get("hash"))
+        if isinstance(last_event, dict) and last_event.get("hash")
+        else ""
+    )
+    seq = (
+        int(last_event.get("seq")) + 1
+        if isinstance(last_event, dict) and isinstance(last_event.get("seq"), int)
+        else count_nonempty_lines(events_path) + 1
+    )
+
+    event_id = (
+        f"{utc_now_iso().replace(':', '').replace('-', '').replace('T', '-').replace('Z', '')}"
+        f"-{uuid.uuid4().hex[:8]}"
+    )
+
+    event_no_hash: dict[str, Any] = {
+        "schema": "context-continuity-event-v1",
+        "seq": seq,
+        "event_id": event_id,
+        "timestamp": utc_now_iso(),
+        "repo_root": str(repo_root),
+        "repo_id": repo_id_value,
+        "kind": kind.strip(),
+        "status": status.strip(),
+        "summary": summary.strip(),
+        "source": source.strip(),
+        "task": task.strip() if isinstance(task, str) and task.strip() else None,
+        "paths": unique_keep_order([p.strip() for p in (paths or []) if p and p.strip()]),
+        "symbols": unique_keep_order([s.strip() for s in (symbols or []) if s and s.strip()]),
+        "commands": unique_keep_order([c.strip() for c in (commands or []) if c and c.strip()]),
+        "refs": unique_keep_order([r.strip() for r in (refs or []) if r and r.strip()]),
+        "payload": payload or {},
+        "prev_hash": prev_hash or None,
+    }
+    event_no_hash = {k: v for k, v in event_no_hash.items() if v not in (None, [], {}, "")}
+    event_hash, line = encode_event(event_no_hash)
+    event = dict(event_no_hash)
+    event["hash"] = event_hash
+    return event, line
 
 
 def append_event(
@@ -176,46 +362,44 @@ def append_event(
     payload: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     with event_file_lock(events_path):
-        last_event = read_last_jsonl_obj(events_path)
-        prev_hash = (
-            str(last_event.get("hash"))
-            if isinstance(last_event, dict) and last_event.get("hash")
-            else ""
-        )
-        seq = (
-            int(last_event.get("seq")) + 1
-            if isinstance(last_event, dict) and isinstance(last_event.get("seq"), int)
-            else count_nonempty_lines(events_path) + 1
+        event, line = _new_event(
+            read_last_jsonl_obj(events_path),
+            events_path,
+            repo_root=repo_root,
+            repo_id_value=repo_id_value,
+            kind=kind,
+            status=status,
+            summary=summary,
+            source=source,
+            task=task,
+            paths=paths,
+            symbols=symbols,
+            commands=commands,
+            refs=refs,
+            payload=payload,
         )
+        _append_line(events_path, line)
+        return event
 
-        event_id = (
-            f"{utc_now_iso().replace(':', '').replace('-', '').replace('T', '-').replace('Z', '')}"
-            f"-{uuid.uuid4().hex[:8]}"
-        )
 
-        event_no_hash: dict[str, Any] = {
-            "schema": "context-continuity-event-v1",
-            "seq": seq,
-            "event_id": event_id,
-            "timestamp": utc_now_iso(),
-            "repo_root": str(repo_root),
-            "repo_id": repo_id_value,
-            "kind": kind.strip(),
-            "status": status.strip(),
-            "summary": summary.strip(),
-            "source": source.strip(),
-            "task": task.strip() if isinstance(task, str) and task.strip() else None,
-            "paths": unique_keep_order([p.strip() for p in (paths or []) if p and p.strip()]),
-            "symbols": unique_keep_order([s.strip() for s in (symbols or []) if s and s.strip()]),
-            "commands": unique_keep_order([c.strip() for c in (commands or []) if c and c.strip()]),
-            "refs": unique_keep_order([r.strip() for r in (refs or []) if r and r.strip()]),
-            "payload": payload or {},
-            "prev_hash": prev_hash or None,
-        }
-        event_no_hash = {k: v for k, v in event_no_hash.items() if v not in (None, [], {}, "")}
-        event_hash = hash_event(event_no_hash)
-        event = dict(event_no_hash)
-        event["hash"] = event_hash
-
-        append_jsonl(events_path, event)
-        return event
+def append_events(
+    events_path: Path, records: list[dict[str, Any]]
+) -> tuple[list[dict[str, Any]], os.stat_result | None, os.stat_result | None]:
+    """Append several events with one lock, one write and one fsync.
+
+    Each record holds `append_event` keyword arguments other than `events_path`;
+    the events are chained in list order. Also returns the events file's stat from
+    just before and just after the write, both taken under the lock.
+    """
+    if not records:
+        return [], None, None
+    with event_file_lock(events_path):
+        last_event = read_last_jsonl_obj(events_path)
+        events: list[dict[str, Any]] = []
+        lines: list[bytes] = []
+        for record in records:
+            last_event, line = _new_event(last_event, events_path, **record)
+            events.append(last_event)
+            lines.append(line)
+        before, after = _append_line(events_path, b"".join(lines))
+        return events, before, after
@@ -4,13 +4,22 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import heapq
 import json
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-from memory_store import approx_tokens, detect_repo_root, memory_root_for_repo
+from memory_store import approx_tokens, atomic_write_bytes, detect_repo_root, json_loads, memory_root_for_repo
+
+# Below this many events the process-pool startup costs more than it saves.
+PARALLEL_SCORE_MIN_EVENTS = 20_000
+
+ScoredEvent = tuple[int, int, dict[str, Any], dict[str, Any]]
 
 
 def read_text(path: Path) -> str:
@@ -19,16 +28,28 @@ def read_text(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
-def read_json(path: Path) -> dict[str, Any]:
-    if not path.exists():
-        return {}
+@functools.lru_cache(maxsize=8)
+def _read_json_cached(path_str: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    # mtime_ns/size are part of the cache key so an edited file is re-read.
     try:
-        loaded = json.loads(path.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
+        loaded = json.loads(Path(path_str).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
         return {}
     return loaded if isinstance(loaded, dict) else {}
 
 
+def read_json(path: Path) -> dict[str, Any]:
+    """Read a JSON object, reusing the parsed result while the file is unchanged.
+
+    The returned dict is shared between calls and must not be mutated.
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return {}
+    return _read_json_cached(str(path), st.st_mtime_ns, st.st_size)
+
+
 def extract_section(markdown: str, heading: str) -> str:
     start = f"## {heading}".strip()
     lines = markdown.splitlines()
@@ -57,19 +78,17 @@ def parse_capsule_path(active_task_md: str) -> str:
 
 def compact_lines(text: str, *, max_lines: int, max_chars: int) -> str:
     out: list[str] = []
+    append = out.append
     chars = 0
     for raw in text.splitlines():
         line = raw.rstrip()
-        if not line.strip():
-            continue
-        if line.startswith("#"):
+        # rstrip() leaves a blank line empty, so one check covers blanks and headings.
+        if not line or line[0] == "#":
             continue
-        if len(out) >= max_lines:
-            break
-        if chars + len(line) > max_chars:
-            break
-        out.append(line)
         chars += len(line)
+        if len(out) >= max_lines or chars > max_chars:
+            break
+        append(line)
     return "\n".join(out)
 
 
@@ -86,28 +105,40 @@ def load_events(path: Path) -> list[dict[str, Any]]:
     events: list[dict[str, Any]] = []
     if not path.exists():
         return events
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
+    # Parse raw bytes directly; skipping the per-line str decode saves a full
+    # pass over the file on the hottest path.
+    with path.open("rb", buffering=1 << 20) as f:
+        for raw in f:
+            if raw.isspace():
                 continue
             try:
-                loaded = json.loads(line)
-            except json.JSONDecodeError:
+                loaded = json_loads(raw)
+            except ValueError:
                 continue
             if isinstance(loaded, dict):
                 events.append(loaded)
     return events
 
 
-def _kind_bonus(kind: str) -> int:
-    if kind in {"risk", "incident", "failure"}:
-        return 12
-    if kind in {"decision", "typed-memory", "automation"}:
-        return 8
-    if kind in {"test", "verify", "benchmark"}:
-        return 7
-    return 0
+_KIND_BONUS = {
+    "risk": 12,
+    "incident": 12,
+    "failure": 12,
+    "decision": 8,
+    "typed-memory": 8,
+    "automation": 8,
+    "test": 7,
+    "verify": 7,
+    "benchmark": 7,
+}
+_STATUS_BONUS = {"failure": 22, "warning": 14, "success": 7}
+# Precomputed (status_bonus, kind_bonus) for the common case where both match,
+# so event_score does one hash probe instead of two.
+_STATUS_KIND_BONUS = {
+    (status, kind): (status_bonus, kind_bonus)
+    for status, status_bonus in _STATUS_BONUS.items()
+    for kind, kind_bonus in _KIND_BONUS.items()
+}
 
 
 def event_score(
@@ -128,19 +159,13 @@ def event_score(
     }
 
     status = str(event.get("status") or "").lower()
-    if status == "failure":
-        score += 22
-        trace["status_bonus"] = 22
-    elif status == "warning":
-        score += 14
-        trace["status_bonus"] = 14
-    elif status == "success":
-        score += 7
-        trace["status_bonus"] = 7
-
     kind = str(event.get("kind") or "").strip().lower()
-    kind_bonus = _kind_bonus(kind)
-    score += kind_bonus
+    bonuses = _STATUS_KIND_BONUS.get((status, kind))
+    if bonuses is None:
+        bonuses = (_STATUS_BONUS.get(status, 0), _KIND_BONUS.get(kind, 0))
+    status_bonus, kind_bonus = bonuses
+    score += status_bonus + kind_bonus
+    trace["status_bonus"] = status_bonus
     trace["kind_bonus"] = kind_bonus
 
     haystack = " ".join(
@@ -168,6 +193,93 @@ def event_score(
     return score, trace
 
 
+def load_recent_events(path: Path, count: int) -> list[dict[str, Any]]:
+    """Return up to the last `count` events, reading the file backwards from the end.
+
+    I/O is bounded by the size of the recent lines instead of the whole history.
+    """
+    events: list[dict[str, Any]] = []
+    if count <= 0 or not path.exists():
+        return events
+    with path.open("rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        window = 1 << 20
+        while True:
+            start = max(0, end - window)
+            f.seek(start)
+            lines = f.read(end - start).split(b"\n")
+            if start > 0:
+                # The first line is probably cut mid-record; the next, larger window covers it.
+                lines = lines[1:]
+            events = []
+            for raw in lines:
+                if not raw or raw.isspace():
+                    continue
+                try:
+                    loaded = json_loads(raw)
+                except ValueError:
+                    continue
+                if isinstance(loaded, dict):
+                    events.append(loaded)
+            if len(events) >= count or start == 0:
+                return events[-count:]
+            window *= 2
+
+
+def _rank_key(row: ScoredEvent) -> tuple[int, int]:
+    return row[0], row[1]
+
+
+def _score_chunk(
+    offset: int,
+    events: list[dict[str, Any]],
+    terms: set[str],
+    task_focus: str,
+    limit: int,
+) -> list[ScoredEvent]:
+    """Score newest-first events starting at recency rank `offset`; keep the local top `limit`."""
+    rows: list[ScoredEvent] = []
+    for idx, event in enumerate(events, start=offset):
+        score, trace = event_score(event, recency_rank=idx, terms=terms, task_focus=task_focus)
+        rows.append((score, -idx, event, trace))
+    return heapq.nlargest(limit, rows, key=_rank_key)
+
+
+def rank_events(
+    events: list[dict[str, Any]],
+    *,
+    terms: set[str],
+    task_focus: str,
+    limit: int,
+) -> list[ScoredEvent]:
+    """Return scored events best-first; at least the top `limit` rows are exact."""
+    newest_first = events[::-1]
+    workers = os.cpu_count() or 1
+    if len(newest_first) >= PARALLEL_SCORE_MIN_EVENTS and workers > 1 and limit >= 0:
+        chunk_size = -(-len(newest_first) // workers)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(
+                        _score_chunk, i, newest_first[i : i + chunk_size], terms, task_focus, limit
+                    )
+                    for i in range(0, len(newest_first), chunk_size)
+                ]
+                parts = [future.result() for future in futures]
+            merged = heapq.merge(*parts, key=_rank_key, reverse=True)
+            return [row for _, row in zip(range(limit), merged)]
+        except (OSError, RuntimeError):
+            # No usable process pool (sandboxed or restricted host); score inline.
+            pass
+
+    scored: list[ScoredEvent] = []
+    for idx, event in enumerate(newest_first):
+        score, trace = event_score(event, recency_rank=idx, terms=terms, task_focus=task_focus)
+        scored.append((score, -idx, event, trace))
+    scored.sort(key=_rank_key, reverse=True)
+    return scored
+
+
 def render_event_line(event: dict[str, Any]) -> str:
     seq = event.get("seq", "?")
     ts = str(event.get("timestamp") or "?")
@@ -185,6 +297,19 @@ def render_event_line(event: dict[str, Any]) -> str:
     return line
 
 
+def point_latest(latest_path: Path, target: Path) -> None:
+    """Atomically repoint `latest_path` at `target` (a sibling file) via a relative symlink."""
+    tmp_link = latest_path.with_name(f"{latest_path.name}.tmp.{os.getpid()}")
+    try:
+        tmp_link.unlink(missing_ok=True)
+        tmp_link.symlink_to(target.name)
+        tmp_link.replace(latest_path)
+    except OSError:
+        # Symlinks unavailable (e.g. Windows without the privilege): copy instead.
+        tmp_link.unlink(missing_ok=True)
+        atomic_write_bytes(latest_path, target.read_bytes())
+
+
 def typed_memory_blocks(typed_memory: dict[str, Any]) -> tuple[str, str, str, str]:
     if not typed_memory:
         return "", "", "", ""
@@ -237,6 +362,11 @@ def main() -> None:
     ap.add_argument("--task", default="", help="Task key for prioritization.")
     ap.add_argument("--max-events", default=25, type=int, help="Maximum events to include.")
     ap.add_argument("--max-decisions", default=6, type=int, help="Maximum decision titles to include.")
+    ap.add_argument(
+        "--recent-only",
+        action="store_true",
+        help="Without --query/--task, rank only the most recent events instead of the whole log.",
+    )
     ap.add_argument("--typed-memory-path", default="", help="Override typed-memory JSON path.")
     ap.add_argument("--no-typed-memory", action="store_true", help="Ignore typed-memory summaries.")
     ap.add_argument("--no-write", action="store_true", help="Do not write output to disk.")
@@ -313,23 +443,26 @@ def main() -> None:
         )
     )
 
-    events = load_events(events_path)
-    scored: list[tuple[int, int, dict[str, Any], dict[str, Any]]] = []
-    for idx, event in enumerate(reversed(events)):
-        score, trace = event_score(
-            event,
-            recency_rank=idx,
-            terms=query_terms,
-            task_focus=args.task.strip(),
-        )
-        scored.append((score, -idx, event, trace))
-    scored.sort(key=lambda row: (row[0], row[1]), reverse=True)
+    trace_limit = max(args.max_events * 2, 20)
+    # Status/kind bonuses can outweigh recency, so older failures and risks may
+    # outrank newer notes; only skip them when the caller opts into a tail read.
+    full_scan = not args.recent_only or bool(args.query.strip() or args.task.strip())
+    if full_scan:
+        events = load_events(events_path)
+    else:
+        events = load_recent_events(events_path, trace_limit)
+    scored = rank_events(
+        events,
+        terms=query_terms,
+        task_focus=args.task.strip(),
+        limit=max(args.max_events, trace_limit),
+    )
     selected = scored[: args.max_events]
     selected_events = [row[2] for row in selected]
     rendered_events = [render_event_line(event) for event in selected_events]
 
     trace_ranked_events: list[dict[str, Any]] = []
-    for score, _neg_idx, event, trace in scored[: max(args.max_events * 2, 20)]:
+    for score, _neg_idx, event, trace in scored[:trace_limit]:
         trace_ranked_events.append(
             {
                 "seq": event.get("seq"),
@@ -355,38 +488,41 @@ def main() -> None:
         f"- Typed memory: `{typed_memory_path if typed_memory else 'none'}`\n"
     )
 
-    block_candidates: list[tuple[str, str, int]] = [
-        ("Active Objective", objective_text, 100),
-        ("Acceptance Criteria", criteria_text, 95),
-        ("Constraints / Non-Goals", constraints_text, 90),
-        ("Current Status", status_text, 88),
-        ("Key Paths", key_paths_text, 87),
-        ("Verification Commands", commands_text, 86),
-        ("Open Risks (Typed)", open_risks_text, 85),
-        ("Top Task Signals (Typed)", top_tasks_text, 84),
-        ("Top Path Signals (Typed)", top_paths_signal_text, 83),
-        ("Recent Decisions (Typed)", recent_decisions_text, 82),
-        ("Project Repo Facts", project_repo_text, 72),
-        ("Project Architecture Facts", project_arch_text, 70),
-        ("Recent Decisions", "\n".join(f"- {title}" for title in decision_titles), 68),
-        (
-            "Capsule Pointer",
-            f"- Active capsule: `{capsule_rel}`\n- Capsule file exists: `{bool(capsule_md)}`",
-            66,
-        ),
-        ("Capsule Excerpt", capsule_excerpt, 62),
-        ("Ranked Events", "\n".join(rendered_events), 58),
-    ]
-    block_candidates.sort(key=lambda item: item[2], reverse=True)
+    block_candidates: list[tuple[int, str, str]] = []
+
+    def add_block(title: str, body: str, priority: int) -> None:
+        if body.strip():
+            block_candidates.append((priority, title, body))
+
+    add_block("Active Objective", objective_text, 100)
+    add_block("Acceptance Criteria", criteria_text, 95)
+    add_block("Constraints / Non-Goals", constraints_text, 90)
+    add_block("Current Status", status_text, 88)
+    add_block("Key Paths", key_paths_text, 87)
+    add_block("Verification Commands", commands_text, 86)
+    add_block("Open Risks (Typed)", open_risks_text, 85)
+    add_block("Top Task Signals (Typed)", top_tasks_text, 84)
+    add_block("Top Path Signals (Typed)", top_paths_signal_text, 83)
+    add_block("Recent Decisions (Typed)", recent_decisions_text, 82)
+    add_block("Project Repo Facts", project_repo_text, 72)
+    add_block("Project Architecture Facts", project_arch_text, 70)
+    add_block("Recent Decisions", "\n".join(f"- {title}" for title in decision_titles), 68)
+    add_block(
+        "Capsule Pointer",
+        f"- Active capsule: `{capsule_rel}`\n- Capsule file exists: `{bool(capsule_md)}`",
+        66,
+    )
+    add_block("Capsule Excerpt", capsule_excerpt, 62)
+    add_block("Ranked Events", "\n".join(rendered_events), 58)
+    # Priorities are unique, so a plain tuple sort orders by priority alone.
+    block_candidates.sort(reverse=True)
 
     selected_blocks: list[str] = [header]
     used_tokens = approx_tokens(header)
     omitted_titles: list[str] = []
     planner_trace: list[dict[str, Any]] = []
 
-    for title, body, priority in block_candidates:
-        if not body.strip():
-            continue
+    for priority, title, body in block_candidates:
         block = f"## {title}\n\n{body.strip()}\n"
         block_tokens = approx_tokens(block)
         included = used_tokens + block_tokens <= args.budget_tokens
@@ -427,6 +563,7 @@ def main() -> None:
         "selected_block_count": sum(1 for row in planner_trace if row.get("included")),
         "omitted_block_count": sum(1 for row in planner_trace if not row.get("included")),
         "planner_trace": planner_trace,
+        "event_scan": "full" if full_scan else f"recent:{trace_limit}",
         "event_ranking": trace_ranked_events,
         "typed_memory_path": str(typed_memory_path) if typed_memory else "",
     }
@@ -440,7 +577,7 @@ def main() -> None:
     out_path = out_dir / f"{ts}--rehydrated.md"
     latest_path = out_dir / "latest.md"
     out_path.write_text(output, encoding="utf-8")
-    latest_path.write_text(output, encoding="utf-8")
+    point_latest(latest_path, out_path)
     print(f"written: {out_path}")
     print(f"written: {latest_path}")
 
@@ -451,8 +588,12 @@ def main() -> None:
     trace_dir.mkdir(parents=True, exist_ok=True)
     trace_path = trace_dir / f"{ts}--trace.json"
     latest_trace = trace_dir / "latest-trace.json"
-    trace_path.write_text(json.dumps(trace_payload, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
-    latest_trace.write_text(json.dumps(trace_payload, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    encoder = json.JSONEncoder(ensure_ascii=False, indent=2, sort_keys=True)
+    with trace_path.open("w", encoding="utf-8") as f:
+        for chunk in encoder.iterencode(trace_payload):
+            f.write(chunk)
+        f.write("\n")
+    point_latest(latest_trace, trace_path)
     print(f"written: {trace_path}")
     print(f"written: {latest_trace}")
 
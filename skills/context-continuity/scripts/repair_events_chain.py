@@ -10,7 +10,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-from memory_store import detect_repo_root, hash_event, memory_root_for_repo, stable_json
+from memory_store import detect_repo_root, encode_event, memory_root_for_repo
 
 
 def load_events(path: Path) -> list[dict[str, Any]]:
@@ -32,8 +32,9 @@ def load_events(path: Path) -> list[dict[str, Any]]:
     return events
 
 
-def normalize_chain(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+def normalize_chain(events: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[bytes]]:
     out: list[dict[str, Any]] = []
+    lines: list[bytes] = []
     prev_hash = ""
     seq = 0
     for event in events:
@@ -45,18 +46,18 @@ def normalize_chain(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
         else:
             normalized.pop("prev_hash", None)
         normalized.pop("hash", None)
-        new_hash = hash_event(normalized)
+        new_hash, line = encode_event(normalized)
         normalized["hash"] = new_hash
         prev_hash = new_hash
         out.append(normalized)
-    return out
+        lines.append(line)
+    return out, lines
 
 
-def write_events(path: Path, events: list[dict[str, Any]]) -> None:
+def write_events(path: Path, lines: list[bytes]) -> None:
     tmp = path.with_name(path.name + ".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        for event in events:
-            f.write(stable_json(event) + "\n")
+    with tmp.open("wb") as f:
+        f.writelines(lines)
         f.flush()
     tmp.replace(path)
 
@@ -87,7 +88,7 @@ def main() -> None:
         print("status: nothing to repair")
         return
 
-    repaired = normalize_chain(events)
+    repaired, repaired_lines = normalize_chain(events)
     changed = any(events[i] != repaired[i] for i in range(len(events)))
 
     print(f"events_file: {events_path}")
@@ -101,7 +102,7 @@ def main() -> None:
     ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
     backup = events_path.with_name(events_path.name + f".bak.{ts}")
     shutil.copy2(events_path, backup)
-    write_events(events_path, repaired)
+    write_events(events_path, repaired_lines)
     print(f"backup: {backup}")
     print("status: repaired")
 
@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import hashlib
 import json
 import os
@@ -14,25 +15,138 @@ from typing import Any
 
 from memory_store import (
     append_event,
+    atomic_write_bytes,
     codex_home,
     detect_repo_root,
     ensure_dir,
     memory_root_for_repo,
     sh,
     slugify,
-    stable_json,
+    utc_iso,
     utc_now_iso,
 )
 
 SESSION_SCHEMA = "context-continuity-session-isolation-v1"
 
+# Environment variables checked, in order, for an implicit session id.
+SESSION_ENV_KEYS = (
+    "CODEX_THREAD_ID",
+    "CODEX_SESSION_ID",
+    "SESSION_ID",
+    "ITERM_SESSION_ID",
+    "TERM_SESSION_ID",
+)
+
+# Re-`ensure` of an unchanged session only rewrites the mapping once its
+# last_seen_at is older than this.
+LAST_SEEN_REFRESH_SECONDS = 60
+
 
+@functools.lru_cache(maxsize=8)
 def _is_git_repo(repo_root: Path) -> bool:
     code, out = sh(repo_root, ["git", "rev-parse", "--is-inside-work-tree"])
     return code == 0 and out.strip().lower() == "true"
 
 
+def _git_dirs(repo_root: Path) -> tuple[Path, Path] | None:
+    """Return (git_dir, common_git_dir) for repo_root, or None for unsupported layouts."""
+    dot_git = repo_root / ".git"
+    if dot_git.is_dir():
+        git_dir = dot_git
+    elif dot_git.is_file():
+        text = dot_git.read_text(encoding="utf-8").strip()
+        if not text.startswith("gitdir:"):
+            return None
+        git_dir = Path(text.removeprefix("gitdir:").strip())
+        if not git_dir.is_absolute():
+            git_dir = repo_root / git_dir
+    else:
+        return None
+    commondir_file = git_dir / "commondir"
+    if commondir_file.is_file():
+        common_dir = git_dir / commondir_file.read_text(encoding="utf-8").strip()
+    else:
+        common_dir = git_dir
+    return git_dir.resolve(), common_dir.resolve()
+
+
+def _resolve_ref(common_dir: Path, ref: str) -> str:
+    loose = common_dir / ref
+    if loose.is_file():
+        value = loose.read_text(encoding="utf-8").strip()
+        if value.startswith("ref: "):
+            return _resolve_ref(common_dir, value.removeprefix("ref: ").strip())
+        return value
+    packed = common_dir / "packed-refs"
+    if packed.is_file():
+        for line in packed.read_text(encoding="utf-8").splitlines():
+            if not line or line[0] in "#^":
+                continue
+            sha, _space, name = line.partition(" ")
+            if name == ref:
+                return sha
+    # Unborn branch: git reports the null object id.
+    return "0" * 40
+
+
+def _head_fields(head_file: Path, common_dir: Path) -> dict[str, Any]:
+    text = head_file.read_text(encoding="utf-8").strip()
+    if text.startswith("ref: "):
+        ref = text.removeprefix("ref: ").strip()
+        return {
+            "head": _resolve_ref(common_dir, ref),
+            "branch_ref": ref,
+            "branch": ref.removeprefix("refs/heads/"),
+        }
+    return {"head": text, "detached": True}
+
+
+def _git_worktrees_fs(repo_root: Path) -> list[dict[str, Any]] | None:
+    """Read worktree metadata straight from the common git dir, without forking git.
+
+    Returns None when the layout is one this reader does not handle (bare repos,
+    separate git dirs, reftable refs, GIT_DIR overrides) so callers can fall back.
+    """
+    if os.environ.get("GIT_DIR") or os.environ.get("GIT_COMMON_DIR"):
+        return None
+    dirs = _git_dirs(repo_root)
+    if dirs is None:
+        return None
+    _git_dir, common_dir = dirs
+    if common_dir.name != ".git" or (common_dir / "reftable").exists():
+        return None
+
+    rows: list[dict[str, Any]] = [
+        {"worktree_path": str(common_dir.parent), **_head_fields(common_dir / "HEAD", common_dir)}
+    ]
+    admin_root = common_dir / "worktrees"
+    if not admin_root.is_dir():
+        return rows
+    for admin_dir in sorted(admin_root.iterdir()):
+        gitdir_file = admin_dir / "gitdir"
+        if not gitdir_file.is_file() or not (admin_dir / "HEAD").is_file():
+            continue
+        pointer = Path(gitdir_file.read_text(encoding="utf-8").strip())
+        if not pointer.is_absolute():
+            pointer = admin_dir / pointer
+        row: dict[str, Any] = {"worktree_path": os.path.normpath(pointer.parent)}
+        row.update(_head_fields(admin_dir / "HEAD", common_dir))
+        if (admin_dir / "locked").exists():
+            row["locked"] = True
+        rows.append(row)
+    return rows
+
+
 def _git_worktrees(repo_root: Path) -> list[dict[str, Any]]:
+    # CODEX_WORKTREE_FS=0 forces the `git worktree list` subprocess path.
+    if os.environ.get("CODEX_WORKTREE_FS", "1") != "0":
+        try:
+            rows = _git_worktrees_fs(repo_root)
+        except (OSError, UnicodeDecodeError):
+            rows = None
+        if rows is not None:
+            return rows
+
     code, out = sh(repo_root, ["git", "worktree", "list", "--porcelain"])
     if code != 0:
         raise RuntimeError(out or "git worktree list failed")
@@ -62,6 +176,33 @@ def _git_worktrees(repo_root: Path) -> list[dict[str, Any]]:
     return rows
 
 
+def _linked_worktree_branch(worktree: Path) -> str | None:
+    """Branch checked out in a linked worktree, read from its admin dir.
+
+    Returns None unless `worktree/.git` points at an admin dir that points back
+    at it (i.e. git still tracks the worktree) and HEAD is on a local branch.
+    """
+    marker = worktree / ".git"
+    try:
+        text = marker.read_text(encoding="utf-8").strip()
+        if not text.startswith("gitdir:"):
+            return None
+        admin_dir = Path(text.removeprefix("gitdir:").strip())
+        if not admin_dir.is_absolute():
+            admin_dir = worktree / admin_dir
+        pointer = Path((admin_dir / "gitdir").read_text(encoding="utf-8").strip())
+        if not pointer.is_absolute():
+            pointer = admin_dir / pointer
+        if pointer.resolve() != marker.resolve():
+            return None
+        head = (admin_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if not head.startswith("ref: refs/heads/"):
+        return None
+    return head.removeprefix("ref: refs/heads/")
+
+
 def _worktree_indexes(repo_root: Path) -> tuple[dict[Path, dict[str, Any]], dict[str, Path]]:
     by_path: dict[Path, dict[str, Any]] = {}
     by_branch: dict[str, Path] = {}
@@ -77,6 +218,15 @@ def _worktree_indexes(repo_root: Path) -> tuple[dict[Path, dict[str, Any]], dict
     return by_path, by_branch
 
 
+@functools.lru_cache(maxsize=8)
+def _worktree_indexes_cached(repo_root_str: str) -> tuple[dict[Path, dict[str, Any]], dict[str, Path]]:
+    """Per-process memo of _worktree_indexes; the result is shared, so treat it as read-only.
+
+    Call `_worktree_indexes_cached.cache_clear()` after adding or pruning worktrees.
+    """
+    return _worktree_indexes(Path(repo_root_str))
+
+
 def _branch_exists(repo_root: Path, branch: str) -> bool:
     code, _out = sh(repo_root, ["git", "show-ref", "--verify", "--quiet", f"refs/heads/{branch}"])
     return code == 0
@@ -107,15 +257,9 @@ def _session_id(explicit: str) -> tuple[str, str]:
     if raw:
         return raw, "arg:session-id"
 
-    env_order = [
-        "CODEX_THREAD_ID",
-        "CODEX_SESSION_ID",
-        "SESSION_ID",
-        "ITERM_SESSION_ID",
-        "TERM_SESSION_ID",
-    ]
-    for key in env_order:
-        value = os.environ.get(key, "").strip()
+    environ = os.environ
+    for key in SESSION_ENV_KEYS:
+        value = environ.get(key, "").strip()
         if value:
             return value, f"env:{key}"
 
@@ -130,7 +274,7 @@ def _session_slug(session_id: str) -> str:
     base = slugify(session_id.lower())
     if len(base) <= 48:
         return base
-    digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:10]
+    digest = hashlib.blake2s(session_id.encode("utf-8"), digest_size=5).hexdigest()
     return f"{base[:36]}-{digest}"
 
 
@@ -138,7 +282,7 @@ def _branch_name(prefix: str, session_slug: str) -> str:
     merged = f"{prefix}/{session_slug}"
     if len(merged) <= 120:
         return merged
-    digest = hashlib.sha1(merged.encode("utf-8")).hexdigest()[:10]
+    digest = hashlib.blake2s(merged.encode("utf-8"), digest_size=5).hexdigest()
     return f"{prefix}/{session_slug[:80]}-{digest}"
 
 
@@ -146,28 +290,90 @@ def _mapping_path(mem_root: Path) -> Path:
     return mem_root / "automation" / "session-isolation.json"
 
 
-def _load_mapping(path: Path) -> dict[str, Any]:
-    if not path.exists():
-        return {}
+def _parse_mapping(path: Path) -> dict[str, Any]:
     try:
-        loaded = json.loads(path.read_text(encoding="utf-8"))
+        loaded = json.loads(path.read_bytes())
     except Exception:
         return {}
     return loaded if isinstance(loaded, dict) else {}
 
 
+@functools.lru_cache(maxsize=16)
+def _load_mapping_cached(path_str: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    return _parse_mapping(Path(path_str))
+
+
+def _load_mapping(path: Path) -> dict[str, Any]:
+    """Load the session mapping, reusing the parse while the file is unchanged.
+
+    The result is shared with the cache: copy anything before mutating it.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return {}
+    return _load_mapping_cached(str(path), st.st_mtime_ns, st.st_size)
+
+
+def _load_mapping_for_update(path: Path) -> dict[str, Any]:
+    """Parse the session mapping into a fresh object the caller may mutate (bypasses the cache)."""
+    return _parse_mapping(path)
+
+
 def _save_mapping(path: Path, payload: dict[str, Any]) -> None:
-    ensure_dir(path.parent)
-    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    """Write compact JSON atomically so concurrent readers never see a partial file."""
+    atomic_write_bytes(path, (json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8"))
 
 
 def _parse_iso8601(ts: str) -> datetime | None:
+    # Fast path for the fixed-width `YYYY-MM-DDTHH:MM:SSZ` layout utc_iso() writes.
+    if len(ts) == 20 and ts[19] == "Z" and ts[4] == ts[7] == "-" and ts[10] == "T" and ts[13] == ts[16] == ":":
+        try:
+            return datetime(
+                int(ts[0:4]),
+                int(ts[5:7]),
+                int(ts[8:10]),
+                int(ts[11:13]),
+                int(ts[14:16]),
+                int(ts[17:19]),
+                tzinfo=timezone.utc,
+            )
+        except ValueError:
+            pass
     try:
         return datetime.fromisoformat(ts.replace("Z", "+00:00"))
     except Exception:
         return None
 
 
+def _dir_has_entries(path: Path) -> bool:
+    """True if `path` is a directory with at least one entry; stops at the first one."""
+    try:
+        with os.scandir(path) as it:
+            return next(it, None) is not None
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def _without_timestamps(mapping: dict[str, Any]) -> dict[str, Any]:
+    """Mapping minus the fields that change on every call (updated_at, last_seen_at)."""
+    stable = {key: value for key, value in mapping.items() if key != "updated_at"}
+    sessions = mapping.get("sessions")
+    if isinstance(sessions, dict):
+        stable["sessions"] = {
+            sid: {k: v for k, v in row.items() if k != "last_seen_at"} if isinstance(row, dict) else row
+            for sid, row in sessions.items()
+        }
+    return stable
+
+
+def _seen_recently(ts: str, now: datetime, seconds: int) -> bool:
+    seen = _parse_iso8601(ts)
+    if seen is None or seen.tzinfo is None:
+        return False
+    return now - seen < timedelta(seconds=seconds)
+
+
 def _render_json(obj: dict[str, Any], as_json: bool) -> None:
     if as_json:
         print(json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=True))
@@ -189,6 +395,8 @@ def _ensure_session(
             "repo_root": str(repo_root),
         }
 
+    now = datetime.now(timezone.utc)
+    now_iso = utc_iso(now)
     session_id, session_source = _session_id(args.session_id)
     session_slug = _session_slug(session_id)
     branch_prefix = _normalize_branch_prefix(args.branch_prefix)
@@ -205,9 +413,10 @@ def _ensure_session(
 
     mapping_file = _mapping_path(mem_root)
     mapping = _load_mapping(mapping_file)
-    sessions = mapping.get("sessions") if isinstance(mapping.get("sessions"), dict) else {}
+    sessions = dict(mapping["sessions"]) if isinstance(mapping.get("sessions"), dict) else {}
     previous = sessions.get(session_id) if isinstance(sessions.get(session_id), dict) else {}
 
+    mapped = False
     if previous:
         prev_branch = str(previous.get("branch") or "").strip()
         prev_path = str(previous.get("worktree_path") or "").strip()
@@ -215,13 +424,22 @@ def _ensure_session(
             branch = prev_branch
         if prev_path:
             target_worktree = Path(prev_path).expanduser().resolve()
-
-    by_path, by_branch = _worktree_indexes(repo_root)
+        mapped = bool(prev_branch and prev_path)
 
     created_branch = False
     created_worktree = False
 
-    branch_path = by_branch.get(branch)
+    by_path: dict[Path, dict[str, Any]] = {}
+    if (
+        mapped
+        and os.environ.get("CODEX_WORKTREE_FS", "1") != "0"
+        and _linked_worktree_branch(target_worktree) == branch
+    ):
+        # Fast path: the mapped worktree is still registered and on its branch.
+        branch_path: Path | None = target_worktree
+    else:
+        by_path, by_branch = _worktree_indexes_cached(str(repo_root.resolve()))
+        branch_path = by_branch.get(branch)
     if branch_path:
         final_worktree = branch_path
     else:
@@ -248,7 +466,7 @@ def _ensure_session(
                     "reason": "target-path-not-directory",
                     "target_worktree": str(target_worktree),
                 }
-            if target_worktree.exists() and any(target_worktree.iterdir()):
+            if _dir_has_entries(target_worktree):
                 return 2, {
                     "status": "failed",
                     "reason": "target-directory-not-empty",
@@ -274,6 +492,7 @@ def _ensure_session(
                     "git_output": out,
                 }
 
+            _worktree_indexes_cached.cache_clear()
             created_worktree = True
             final_worktree = target_worktree
 
@@ -284,18 +503,23 @@ def _ensure_session(
         "branch": branch,
         "worktree_path": str(final_worktree),
         "base_ref": base_ref,
-        "created_at": str(previous.get("created_at") or utc_now_iso()),
-        "last_seen_at": utc_now_iso(),
+        "created_at": str(previous.get("created_at") or now_iso),
+        "last_seen_at": now_iso,
     }
 
     mapping_payload = {
         "schema": SESSION_SCHEMA,
         "repo_root": str(repo_root),
         "memory_root": str(mem_root),
-        "updated_at": utc_now_iso(),
+        "updated_at": now_iso,
         "sessions": sessions,
     }
-    _save_mapping(mapping_file, mapping_payload)
+    unchanged = _without_timestamps(mapping_payload) == _without_timestamps(mapping)
+    if not (
+        unchanged
+        and _seen_recently(str(previous.get("last_seen_at") or ""), now, LAST_SEEN_REFRESH_SECONDS)
+    ):
+        _save_mapping(mapping_file, mapping_payload)
 
     topology_changed = (
         not previous
@@ -367,7 +591,21 @@ def _list_sessions(
 
     by_path, _by_branch = ({}, {})
     if _is_git_repo(repo_root):
-        by_path, _by_branch = _worktree_indexes(repo_root)
+        by_path, _by_branch = _worktree_indexes_cached(str(repo_root.resolve()))
+
+    # One directory listing per worktrees root instead of a stat per session.
+    present_by_parent: dict[Path, set[str]] = {}
+
+    def present_names(parent: Path) -> set[str]:
+        names = present_by_parent.get(parent)
+        if names is None:
+            try:
+                with os.scandir(parent) as it:
+                    names = {entry.name for entry in it}
+            except OSError:
+                names = set()
+            present_by_parent[parent] = names
+        return names
 
     rows: list[dict[str, Any]] = []
     for session_id in sorted(sessions.keys()):
@@ -375,19 +613,26 @@ def _list_sessions(
         if not isinstance(row, dict):
             continue
         worktree_path = Path(str(row.get("worktree_path") or "")).expanduser()
-        resolved = worktree_path.resolve() if str(worktree_path) else worktree_path
         active_branch = ""
         active = False
-        if resolved and resolved in by_path:
+        # _ensure_session stores resolved paths; only resolve legacy entries that miss.
+        git_row = by_path.get(worktree_path)
+        if git_row is None and str(worktree_path) and by_path:
+            git_row = by_path.get(worktree_path.resolve())
+        if git_row is not None:
             active = True
-            active_branch = str(by_path[resolved].get("branch") or "")
+            active_branch = str(git_row.get("branch") or "")
         rows.append(
             {
                 "session_id": session_id,
                 "session_slug": str(row.get("session_slug") or ""),
                 "branch": str(row.get("branch") or ""),
                 "worktree_path": str(worktree_path),
-                "exists": worktree_path.exists() if str(worktree_path) else False,
+                "exists": (
+                    worktree_path.name in present_names(worktree_path.parent)
+                    if worktree_path.name
+                    else worktree_path.exists()
+                ),
                 "active_in_git": active,
                 "active_branch": active_branch,
                 "last_seen_at": str(row.get("last_seen_at") or ""),
@@ -409,34 +654,32 @@ def _list_sessions(
         print(f"mapping_file: {mapping_file}")
         print(f"session_count: {len(rows)}")
         for row in rows:
-            print(
-                "- "
-                + stable_json(
-                    {
-                        "session_id": row["session_id"],
-                        "branch": row["branch"],
-                        "worktree_path": row["worktree_path"],
-                        "exists": row["exists"],
-                        "active_in_git": row["active_in_git"],
-                    }
-                )
-            )
+            # Keys are already in sorted order, so no per-row sort_keys pass is needed.
+            summary = {
+                "active_in_git": row["active_in_git"],
+                "branch": row["branch"],
+                "exists": row["exists"],
+                "session_id": row["session_id"],
+                "worktree_path": row["worktree_path"],
+            }
+            print("- " + json.dumps(summary, ensure_ascii=False, separators=(",", ":")))
     return 0, payload
 
 
 def _path_for_session(*, repo_root: Path, mem_root: Path, args: argparse.Namespace) -> tuple[int, dict[str, Any]]:
-    _code, payload = _list_sessions(repo_root=repo_root, mem_root=mem_root, as_json=True)
     session_id, _source = _session_id(args.session_id)
+    mapping = _load_mapping(_mapping_path(mem_root))
+    sessions = mapping.get("sessions") if isinstance(mapping.get("sessions"), dict) else {}
 
-    for row in payload.get("sessions") or []:
-        if str(row.get("session_id") or "") == session_id:
-            result = {
-                "status": "ok",
-                "session_id": session_id,
-                "worktree_path": str(row.get("worktree_path") or ""),
-                "branch": str(row.get("branch") or ""),
-            }
-            return 0, result
+    row = sessions.get(session_id)
+    if isinstance(row, dict):
+        result = {
+            "status": "ok",
+            "session_id": session_id,
+            "worktree_path": str(Path(str(row.get("worktree_path") or "")).expanduser()),
+            "branch": str(row.get("branch") or ""),
+        }
+        return 0, result
 
     if args.strict:
         return 2, {
@@ -462,19 +705,22 @@ def _prune_sessions(
         }
 
     sh(repo_root, ["git", "worktree", "prune"])
-    by_path, _by_branch = _worktree_indexes(repo_root)
+    _worktree_indexes_cached.cache_clear()
+    by_path, _by_branch = _worktree_indexes_cached(str(repo_root.resolve()))
 
     mapping_file = _mapping_path(mem_root)
-    mapping = _load_mapping(mapping_file)
-    sessions = mapping.get("sessions") if isinstance(mapping.get("sessions"), dict) else {}
+    # A private parse, so sessions can be pruned in place without copying.
+    mapping = _load_mapping_for_update(mapping_file)
+    sessions = mapping["sessions"] if isinstance(mapping.get("sessions"), dict) else {}
 
     now = datetime.now(timezone.utc)
     deadline = now - timedelta(days=max(0, stale_days))
     removed: list[dict[str, str]] = []
+    drop_ids: list[str] = []
 
-    kept: dict[str, Any] = {}
     for session_id, row in sessions.items():
         if not isinstance(row, dict):
+            drop_ids.append(session_id)
             continue
         path_text = str(row.get("worktree_path") or "").strip()
         worktree_path = Path(path_text).expanduser().resolve() if path_text else None
@@ -497,16 +743,17 @@ def _prune_sessions(
                     "worktree_path": str(row.get("worktree_path") or ""),
                 }
             )
-            continue
+            drop_ids.append(session_id)
 
-        kept[session_id] = row
+    for session_id in drop_ids:
+        del sessions[session_id]
 
     mapping_payload = {
         "schema": SESSION_SCHEMA,
         "repo_root": str(repo_root),
         "memory_root": str(mem_root),
-        "updated_at": utc_now_iso(),
-        "sessions": kept,
+        "updated_at": utc_iso(now),
+        "sessions": sessions,
     }
     _save_mapping(mapping_file, mapping_payload)
 
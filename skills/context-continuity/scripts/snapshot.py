@@ -4,11 +4,12 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import subprocess
 from datetime import datetime
 from pathlib import Path
 
-from memory_store import detect_repo_root, memory_root_for_repo, read_last_jsonl_obj, slugify
+from memory_store import detect_repo_root, jsonl_summary, memory_root_for_repo, slugify
 
 
 def sh(repo_root: Path, cmd: list[str]) -> str:
@@ -19,6 +20,99 @@ def sh(repo_root: Path, cmd: list[str]) -> str:
         return f"<error running {' '.join(cmd)}: {e}>"
 
 
+async def _run(repo_root: Path, cmd: list[str]) -> str:
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=repo_root,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        out, _ = await proc.communicate()
+    except Exception as e:
+        return f"<error running {' '.join(cmd)}: {e}>"
+    if proc.returncode != 0:
+        e = subprocess.CalledProcessError(proc.returncode, cmd)
+        return f"<error running {' '.join(cmd)}: {e}>"
+    return out.decode("utf-8", errors="replace").strip()
+
+
+async def _collect(repo_root: Path, cmds: list[list[str]]) -> list[str]:
+    return list(await asyncio.gather(*(_run(repo_root, cmd) for cmd in cmds)))
+
+
+def sh_many(repo_root: Path, cmds: list[list[str]]) -> list[str]:
+    """Run independent commands concurrently; same output/error shape as `sh()`."""
+    try:
+        return asyncio.run(_collect(repo_root, cmds))
+    except RuntimeError:
+        # Already inside an event loop (e.g. imported by another tool): run serially.
+        return [sh(repo_root, cmd) for cmd in cmds]
+
+
+_C_ESCAPES = {
+    0x07: "a", 0x08: "b", 0x09: "t", 0x0A: "n", 0x0B: "v", 0x0C: "f", 0x0D: "r", 0x22: '"', 0x5C: "\\",
+}
+
+
+def _quote_path(path: str, *, quote_space: bool) -> str:
+    """C-quote a path the way git does with the default `core.quotePath=true`."""
+    raw = path.encode("utf-8", errors="surrogateescape")
+    if not any(b < 0x20 or b >= 0x7F or b in (0x22, 0x5C) or (quote_space and b == 0x20) for b in raw):
+        return path
+    out = []
+    for b in raw:
+        if b in _C_ESCAPES:
+            out.append("\\" + _C_ESCAPES[b])
+        elif b < 0x20 or b >= 0x7F:
+            out.append(f"\\{b:03o}")
+        else:
+            out.append(chr(b))
+    return '"' + "".join(out) + '"'
+
+
+def parse_status_v2(out: str) -> tuple[str, str, str]:
+    """Split `git status --porcelain=v2 -z` into v1-style status, staged and unstaged name lists."""
+    status: list[str] = []
+    staged: list[str] = []
+    unstaged: list[str] = []
+    entries = out.split("\0")
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+        kind = entry[0]
+        if kind in "?!":
+            status.append(f"{kind * 2} {_quote_path(entry[2:], quote_space=True)}")
+            continue
+        if kind == "1":
+            fields = entry.split(" ", 8)
+        elif kind == "2":
+            fields = entry.split(" ", 9)
+        elif kind == "u":
+            fields = entry.split(" ", 10)
+        else:
+            continue
+        xy, path = fields[1], fields[-1]
+        shown = _quote_path(path, quote_space=True)
+        if kind == "2" and i < len(entries):
+            # Renames/copies carry the original path as the next NUL-separated field.
+            shown = f"{_quote_path(entries[i], quote_space=True)} -> {shown}"
+            i += 1
+        status.append(f"{xy.replace('.', ' ')} {shown}")
+        if kind == "u" or xy[0] != ".":
+            staged.append(path)
+        if kind == "u" or xy[1] != ".":
+            unstaged.append(path)
+    return (
+        "\n".join(status),
+        "\n".join(_quote_path(p, quote_space=False) for p in staged),
+        "\n".join(_quote_path(p, quote_space=False) for p in unstaged),
+    )
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--repo", default=".", help="Repo directory (defaults to cwd).")
@@ -38,19 +132,28 @@ def main() -> None:
     suffix = f"--{slug}" if slug else ""
     out_path = out_dir / f"{ts}{suffix}.md"
 
-    branch = sh(repo_root, ["git", "rev-parse", "--abbrev-ref", "HEAD"])
-    head = sh(repo_root, ["git", "rev-parse", "HEAD"])
-    status = sh(repo_root, ["git", "status", "--porcelain=v1"])
-    staged = sh(repo_root, ["git", "diff", "--name-only", "--cached"])
-    changed = sh(repo_root, ["git", "diff", "--name-only"])
-    stat = sh(repo_root, ["git", "diff", "--stat"])
+    # --abbrev-ref applies to the revisions after it, so one call prints the
+    # full HEAD sha followed by the branch name.
+    revs, status_v2, stat = sh_many(
+        repo_root,
+        [
+            ["git", "rev-parse", "HEAD", "--abbrev-ref", "HEAD"],
+            ["git", "status", "--porcelain=v2", "-z"],
+            ["git", "diff", "--stat"],
+        ],
+    )
+    head, _nl, branch = revs.partition("\n")
+    if not branch:
+        # The call failed; report its error for both fields.
+        branch = head
+    if status_v2.startswith("<error running "):
+        status = staged = changed = status_v2
+    else:
+        # One index/worktree scan yields the status, staged and unstaged lists.
+        status, staged, changed = parse_status_v2(status_v2)
     events_path = mem_root / "events" / "events.jsonl"
 
-    event_count = 0
-    if events_path.exists():
-        with events_path.open("r", encoding="utf-8") as f:
-            event_count = sum(1 for line in f if line.strip())
-    last_event = read_last_jsonl_obj(events_path)
+    event_count, last_event = jsonl_summary(events_path)
     last_event_seq = ""
     last_event_hash = ""
     if last_event:
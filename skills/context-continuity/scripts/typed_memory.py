@@ -4,36 +4,101 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
-from collections import Counter
+import mmap
+import os
+import re
+import sys
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Any
 
-from memory_store import append_event, detect_repo_root, memory_root_for_repo, stable_json, utc_now_iso
+from memory_store import (
+    append_events,
+    atomic_write_files,
+    detect_repo_root,
+    json_loads,
+    memory_root_for_repo,
+    utc_now_iso,
+)
+
+try:
+    import xxhash
+except ImportError:  # optional accelerator for the display-only summary fingerprint
+    xxhash = None
+
+DECISION_KINDS = frozenset({"decision", "adr", "architecture-decision"})
+RISK_KINDS = frozenset({"risk", "incident", "bug"})
+RISK_STATUSES = frozenset({"failure", "warning"})
+_DECISION_RE = re.compile("decision", re.IGNORECASE)
+
+# With the stdlib parser, event logs up to this size are decoded as a single JSON array.
+BULK_PARSE_MAX_BYTES = 64 << 20
+# Event logs at least this large are iterated through mmap instead of read into memory.
+MMAP_MIN_BYTES = 64 << 10
+
+
+def _read_marker(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
 
 
-def _read_text(path: Path) -> str:
-    if not path.exists():
-        return ""
-    return path.read_text(encoding="utf-8")
-
-
-def _load_events(path: Path) -> list[dict[str, Any]]:
-    out: list[dict[str, Any]] = []
-    if not path.exists():
-        return out
-    with path.open("r", encoding="utf-8") as f:
-        for raw in f:
-            line = raw.strip()
-            if not line:
-                continue
-            try:
-                row = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-            if isinstance(row, dict):
-                out.append(row)
-    return out
+def _iter_lines(path: Path, size: int) -> Iterator[bytes]:
+    """Yield non-blank lines; large files are walked through mmap rather than read whole."""
+    with path.open("rb") as f:
+        if size < MMAP_MIN_BYTES:
+            data = f.read()
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for raw in iter(mm.readline, b""):
+                    if not raw.isspace():
+                        yield raw
+            return
+    for raw in data.splitlines():
+        if raw and not raw.isspace():
+            yield raw
+
+
+def _load_events(path: Path, tail: int | None = None) -> list[dict[str, Any]]:
+    """Parse events.jsonl; with `tail`, only the last `tail` events are kept in memory."""
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return []
+    lines: Iterable[bytes] = _iter_lines(path, size)
+    if json_loads is json.loads and size <= BULK_PARSE_MAX_BYTES:
+        # One stdlib decode of "[line,line,...]" beats a json.loads call per line.
+        # Only trusted when it yields exactly one object per line; otherwise fall
+        # through so bad lines are skipped individually.
+        lines = list(lines)
+        window = lines[-tail:] if tail else lines
+        try:
+            rows = json.loads(b"[" + b",".join(window) + b"]")
+        except ValueError:
+            rows = None
+        if rows is not None and len(rows) == len(window) and all(isinstance(row, dict) for row in rows):
+            return rows
+
+    out: deque[dict[str, Any]] = deque(maxlen=tail)
+    for raw in lines:
+        try:
+            row = json_loads(raw)
+        except ValueError:
+            continue
+        if isinstance(row, dict):
+            out.append(row)
+    return list(out)
+
+
+def _s(value: Any) -> str:
+    """`str(value or "").strip()`, skipping the copies when value is already a trimmed str."""
+    if isinstance(value, str):
+        return value.strip() if value[:1].isspace() or value[-1:].isspace() else value
+    return str(value).strip() if value else ""
 
 
 def _top(counter: Counter[str], limit: int) -> list[dict[str, Any]]:
@@ -44,122 +109,272 @@ def _top(counter: Counter[str], limit: int) -> list[dict[str, Any]]:
 
 
 def _extract(events: list[dict[str, Any]], max_items: int) -> dict[str, Any]:
-    decisions: list[dict[str, Any]] = []
-    risks: list[dict[str, Any]] = []
-    successes: list[dict[str, Any]] = []
-
-    task_counter: Counter[str] = Counter()
-    path_counter: Counter[str] = Counter()
-    symbol_counter: Counter[str] = Counter()
-    command_counter: Counter[str] = Counter()
+    # Only the newest max_items of each category are reported; counts cover all of them.
+    decisions: deque[dict[str, Any]] = deque(maxlen=max_items)
+    risks: deque[dict[str, Any]] = deque(maxlen=max_items)
+    successes: deque[dict[str, Any]] = deque(maxlen=max_items)
+    decision_count = risk_count = success_count = 0
+
+    # One counter keyed by (field, value): 0=task, 1=path, 2=symbol, 3=command.
+    counts: Counter[tuple[int, str]] = Counter()
+    count_all = counts.update
+    _str = str
+    _strip = str.strip
+    decision_search = _DECISION_RE.search
+    s = _s
+    # kind/status/task and the counted values repeat across events: share one str each.
+    _intern = sys.intern
 
     for ev in events:
-        kind = str(ev.get("kind") or "").strip().lower()
-        status = str(ev.get("status") or "").strip().lower()
-        summary = str(ev.get("summary") or "").strip()
-        task = str(ev.get("task") or "").strip()
-        ts = str(ev.get("timestamp") or "")
-        seq = ev.get("seq")
-        hash_short = str(ev.get("hash") or "")[:10]
+        kind = s(ev.get("kind"))
+        if not kind.islower():
+            kind = kind.lower()
+        kind = _intern(kind)
+        status = s(ev.get("status"))
+        if not status.islower():
+            status = status.lower()
+        status = _intern(status)
+        summary = s(ev.get("summary"))
+        task = _intern(s(ev.get("task")))
 
         if task:
-            task_counter[task] += 1
-
-        for path in ev.get("paths") or []:
-            text = str(path).strip()
-            if text:
-                path_counter[text] += 1
+            counts[(0, task)] += 1
+        count_all((1, _intern(text)) for text in (_strip(_str(p)) for p in ev.get("paths") or ()) if text)
+        count_all((2, _intern(text)) for text in (_strip(_str(sym)) for sym in ev.get("symbols") or ()) if text)
+        count_all((3, _intern(text)) for text in (_strip(_str(cmd)) for cmd in ev.get("commands") or ()) if text)
 
-        for symbol in ev.get("symbols") or []:
-            text = str(symbol).strip()
-            if text:
-                symbol_counter[text] += 1
-
-        for command in ev.get("commands") or []:
-            text = str(command).strip()
-            if text:
-                command_counter[text] += 1
+        is_decision = kind in DECISION_KINDS or decision_search(summary) is not None
+        is_risk = status in RISK_STATUSES or kind in RISK_KINDS
+        is_success = status == "success"
+        if not (is_decision or is_risk or is_success):
+            continue
 
         snapshot = {
-            "seq": seq,
-            "timestamp": ts,
-            "hash": hash_short,
+            "seq": ev.get("seq"),
+            "timestamp": str(ev.get("timestamp") or ""),
+            "hash": str(ev.get("hash") or "")[:10],
             "kind": kind,
             "status": status,
             "summary": summary,
             "task": task,
         }
-
-        if kind in {"decision", "adr", "architecture-decision"} or "decision" in summary.lower():
+        if is_decision:
+            decision_count += 1
             decisions.append(snapshot)
-        if status in {"failure", "warning"} or kind in {"risk", "incident", "bug"}:
+        if is_risk:
+            risk_count += 1
             risks.append(snapshot)
-        if status == "success":
+        if is_success:
+            success_count += 1
             successes.append(snapshot)
 
+    task_counter: Counter[str] = Counter()
+    path_counter: Counter[str] = Counter()
+    symbol_counter: Counter[str] = Counter()
+    command_counter: Counter[str] = Counter()
+    by_field = (task_counter, path_counter, symbol_counter, command_counter)
+    # Insertion order is kept per field, so most_common() breaks ties as before.
+    for (field, value), count in counts.items():
+        by_field[field][value] = count
+
     typed = {
         "schema": "context-continuity-typed-memory-v1",
         "generated_at": utc_now_iso(),
         "event_count": len(events),
-        "decision_count": len(decisions),
-        "risk_count": len(risks),
-        "success_count": len(successes),
+        "decision_count": decision_count,
+        "risk_count": risk_count,
+        "success_count": success_count,
         "top_tasks": _top(task_counter, max_items),
         "top_paths": _top(path_counter, max_items),
         "top_symbols": _top(symbol_counter, max_items),
         "top_commands": _top(command_counter, max_items),
-        "recent_decisions": decisions[-max_items:],
-        "open_risks": risks[-max_items:],
-        "recent_successes": successes[-max_items:],
+        "recent_decisions": list(decisions),
+        "open_risks": list(risks),
+        "recent_successes": list(successes),
         "latest_event": events[-1] if events else {},
     }
     return typed
 
 
+def _render_item(item: Any) -> str:
+    if isinstance(item, dict) and "value" in item:
+        return f"- {item.get('value')} (count={item.get('count')})"
+    if isinstance(item, dict):
+        seq = item.get("seq", "?")
+        status = item.get("status", "info")
+        summary = _s(item.get("summary"))
+        hash_short = str(item.get("hash") or "")
+        return f"- E{seq} {status}: {summary} | hash:{hash_short}"
+    return f"- {item}"
+
+
 def _render_markdown(payload: dict[str, Any]) -> str:
-    lines: list[str] = []
-    lines.append("# Typed Memory")
-    lines.append("")
-    lines.append(f"- Generated: `{payload.get('generated_at', '')}`")
-    lines.append(f"- Events analyzed: `{payload.get('event_count', 0)}`")
-    lines.append(f"- Open risks: `{payload.get('risk_count', 0)}`")
-    lines.append(f"- Decisions: `{payload.get('decision_count', 0)}`")
-    lines.append("")
-
-    def section(title: str, key: str) -> None:
-        lines.append(f"## {title}")
+    def section(title: str, key: str) -> str:
         items = payload.get(key) or []
-        if not items:
-            lines.append("- none")
-            lines.append("")
-            return
-        for item in items:
-            if isinstance(item, dict) and "value" in item:
-                lines.append(f"- {item.get('value')} (count={item.get('count')})")
-            elif isinstance(item, dict):
-                seq = item.get("seq", "?")
-                status = item.get("status", "info")
-                summary = str(item.get("summary") or "").strip()
-                hash_short = str(item.get("hash") or "")
-                lines.append(f"- E{seq} {status}: {summary} | hash:{hash_short}")
-            else:
-                lines.append(f"- {item}")
-        lines.append("")
-
-    section("Top Tasks", "top_tasks")
-    section("Top Paths", "top_paths")
-    section("Top Symbols", "top_symbols")
-    section("Top Commands", "top_commands")
-    section("Recent Decisions", "recent_decisions")
-    section("Open Risks", "open_risks")
-    section("Recent Successes", "recent_successes")
-
-    return "\n".join(lines).rstrip() + "\n"
+        body = "\n".join(map(_render_item, items)) if items else "- none"
+        return f"## {title}\n{body}"
+
+    parts = [
+        "# Typed Memory\n\n"
+        f"- Generated: `{payload.get('generated_at', '')}`\n"
+        f"- Events analyzed: `{payload.get('event_count', 0)}`\n"
+        f"- Open risks: `{payload.get('risk_count', 0)}`\n"
+        f"- Decisions: `{payload.get('decision_count', 0)}`",
+        section("Top Tasks", "top_tasks"),
+        section("Top Paths", "top_paths"),
+        section("Top Symbols", "top_symbols"),
+        section("Top Commands", "top_commands"),
+        section("Recent Decisions", "recent_decisions"),
+        section("Open Risks", "open_risks"),
+        section("Recent Successes", "recent_successes"),
+    ]
+    return "\n\n".join(parts).rstrip() + "\n"
+
+
+def _stamp(st: os.stat_result | None, args: argparse.Namespace) -> str:
+    """Events-file state plus the options that shape the summary; "" if there is no log."""
+    if st is None:
+        return ""
+    return f"{st.st_mtime_ns} {st.st_size} {args.max_events} {args.max_items}"
+
+
+def _fingerprint(data: bytes) -> str:
+    """12 hex chars identifying a payload for display; not a security boundary."""
+    if xxhash is not None:
+        return xxhash.xxh3_64(data).hexdigest()[:12]
+    return hashlib.blake2b(data, digest_size=6).hexdigest()
+
+
+def _report(args: argparse.Namespace, payload: dict[str, Any], payload_json: bytes, changed: bool) -> None:
+    if args.json:
+        sys.stdout.flush()
+        sys.stdout.buffer.write(payload_json)
+        sys.stdout.buffer.flush()
+        return
+    mem_root = Path(str(payload.get("memory_root", "")))
+    print(f"repo_root: {payload.get('repo_root', '')}")
+    print(f"memory_root: {mem_root}")
+    print(f"events_file: {payload.get('events_file', '')}")
+    print(f"typed_memory_json: {mem_root / 'typed-memory.json'}")
+    print(f"typed_memory_md: {mem_root / 'typed-memory.md'}")
+    print(f"event_count: {payload.get('event_count', 0)}")
+    print(f"risk_count: {payload.get('risk_count', 0)}")
+    print(f"decision_count: {payload.get('decision_count', 0)}")
+    print(f"changed: {changed}")
+    print(f"summary_hash: {_fingerprint(payload_json)}")
+
+
+def _refresh(repo_arg: str, args: argparse.Namespace) -> tuple[Path, dict[str, Any], Path, str] | None:
+    """Rebuild one repo's typed memory.
+
+    Returns (events_path, record, stamp_path, loaded_stamp) when a typed-memory event
+    is due; the caller appends it and then calls `_write_stamp_after_append`.
+    """
+    repo_root = detect_repo_root(Path(repo_arg).expanduser())
+    mem_root = memory_root_for_repo(repo_root)
+    events_path = mem_root / "events" / "events.jsonl"
+    out_json = mem_root / "typed-memory.json"
+    out_md = mem_root / "typed-memory.md"
+    # Digest of the last written typed-memory.json, so no-op runs need not re-read it.
+    out_sha = mem_root / "typed-memory.json.sha"
+    # Events-file state the outputs were built from (after our own typed-memory event).
+    stamp_path = mem_root / ".typed-memory.stamp"
+
+    # Taken before reading: anything appended while we summarize must not be stamped.
+    try:
+        loaded_stamp = _stamp(events_path.stat(), args)
+    except OSError:
+        loaded_stamp = ""
+
+    if args.record_event != "always":
+        if loaded_stamp and loaded_stamp == _read_marker(stamp_path) and out_md.exists():
+            try:
+                cached_json = out_json.read_bytes()
+                cached = json.loads(cached_json)
+            except (OSError, ValueError):
+                cached = None
+            if isinstance(cached, dict):
+                # Nothing was appended since the last run: report the stored summary as is.
+                _report(args, cached, cached_json, changed=False)
+                return None
+
+    events = _load_events(events_path, tail=args.max_events if args.max_events > 0 else None)
+
+    payload = _extract(events, max_items=max(1, args.max_items))
+    payload["repo_root"] = str(repo_root)
+    payload["memory_root"] = str(mem_root)
+    payload["events_file"] = str(events_path)
+
+    # Serialized once: written to disk, digested, fingerprinted and printed for --json.
+    # Always stdlib: orjson formats floats differently, and these bytes are digested
+    # and compared across runs.
+    new_json = (json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8")
+    new_digest = hashlib.blake2b(new_json, digest_size=16).hexdigest()
+    changed = new_digest != _read_marker(out_sha) or not out_json.exists()
+
+    if changed and not args.no_write:
+        # Digest last: if anything before it fails, the next run sees a mismatch and rewrites.
+        atomic_write_files(
+            [
+                (out_json, new_json),
+                (out_md, _render_markdown(payload).encode("utf-8")),
+                (out_sha, (new_digest + "\n").encode("utf-8")),
+            ]
+        )
+
+    _report(args, payload, new_json, changed)
+
+    should_record = (
+        args.record_event == "always"
+        or (args.record_event == "on-change" and changed)
+    )
+    if not should_record:
+        _write_stamp(stamp_path, loaded_stamp, args)
+        return None
+    record = {
+        "repo_root": repo_root,
+        "repo_id_value": mem_root.name,
+        "kind": "typed-memory",
+        "status": "success",
+        "summary": "refreshed typed-memory summary",
+        "source": "typed-memory",
+        "task": "continuity-optimization",
+        "paths": [str(out_json), str(out_md)],
+        "payload": {
+            "event_count": payload.get("event_count", 0),
+            "risk_count": payload.get("risk_count", 0),
+            "decision_count": payload.get("decision_count", 0),
+            "changed": changed,
+        },
+    }
+    return events_path, record, stamp_path, loaded_stamp
+
+
+def _write_stamp(stamp_path: Path, stamp: str, args: argparse.Namespace) -> None:
+    if args.no_write or not stamp:
+        return
+    stamp_path.write_text(stamp + "\n", encoding="utf-8")
+
+
+def _write_stamp_after_append(
+    stamp_path: Path,
+    loaded_stamp: str,
+    before: os.stat_result | None,
+    after: os.stat_result | None,
+    args: argparse.Namespace,
+) -> None:
+    """Cover our own event only if nothing else was appended since the events were loaded."""
+    stamp = _stamp(after, args) if _stamp(before, args) == loaded_stamp else loaded_stamp
+    _write_stamp(stamp_path, stamp, args)
 
 
 def main() -> None:
     ap = argparse.ArgumentParser()
-    ap.add_argument("--repo", default=".", help="Repo directory (defaults to cwd).")
+    ap.add_argument(
+        "--repo",
+        action="append",
+        help="Repo directory (defaults to cwd). Repeat to refresh several repos in one run.",
+    )
     ap.add_argument(
         "--max-events",
         default=500,
@@ -178,76 +393,35 @@ def main() -> None:
         choices=["off", "on-change", "always"],
         help="Capture a typed-memory event.",
     )
+    ap.add_argument(
+        "--append-batch",
+        action="store_true",
+        help=(
+            "Hold typed-memory events until every --repo is refreshed, then append them with "
+            "one locked write per events file (repos sharing a memory root do not see each "
+            "other's event in this run's summaries)."
+        ),
+    )
     ap.add_argument("--no-write", action="store_true", help="Print payload but do not write files.")
     ap.add_argument("--json", action="store_true", help="Print JSON payload.")
     args = ap.parse_args()
 
-    repo_root = detect_repo_root(Path(args.repo).expanduser())
-    mem_root = memory_root_for_repo(repo_root)
-    events_path = mem_root / "events" / "events.jsonl"
-    out_json = mem_root / "typed-memory.json"
-    out_md = mem_root / "typed-memory.md"
-
-    events = _load_events(events_path)
-    if args.max_events > 0:
-        events = events[-args.max_events :]
-
-    payload = _extract(events, max_items=max(1, args.max_items))
-    payload["repo_root"] = str(repo_root)
-    payload["memory_root"] = str(mem_root)
-    payload["events_file"] = str(events_path)
-
-    old_json = _read_text(out_json)
-    new_json = json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True) + "\n"
-    changed = old_json != new_json
-
-    if not args.no_write:
-        out_json.write_text(new_json, encoding="utf-8")
-        out_md.write_text(_render_markdown(payload), encoding="utf-8")
-
-    should_record = (
-        args.record_event == "always"
-        or (args.record_event == "on-change" and changed)
-    )
-    if should_record:
-        append_event(
-            events_path=events_path,
-            repo_root=repo_root,
-            repo_id_value=mem_root.name,
-            kind="typed-memory",
-            status="success",
-            summary="refreshed typed-memory summary",
-            source="typed-memory",
-            task="continuity-optimization",
-            paths=[str(out_json), str(out_md)],
-            payload={
-                "event_count": payload.get("event_count", 0),
-                "risk_count": payload.get("risk_count", 0),
-                "decision_count": payload.get("decision_count", 0),
-                "changed": changed,
-            },
-        )
-
-    if args.json:
-        print(json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True))
-    else:
-        print(f"repo_root: {repo_root}")
-        print(f"memory_root: {mem_root}")
-        print(f"events_file: {events_path}")
-        print(f"typed_memory_json: {out_json}")
-        print(f"typed_memory_md: {out_md}")
-        print(f"event_count: {payload.get('event_count', 0)}")
-        print(f"risk_count: {payload.get('risk_count', 0)}")
-        print(f"decision_count: {payload.get('decision_count', 0)}")
-        print(f"changed: {changed}")
-        print(f"summary_hash: {hashlib_sha1(stable_json(payload))}")
-
-
-
-def hashlib_sha1(text: str) -> str:
-    import hashlib
-
-    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+    pending: dict[Path, list[tuple[dict[str, Any], Path, str]]] = {}
+    for repo_arg in args.repo or ["."]:
+        due = _refresh(repo_arg, args)
+        if due is None:
+            continue
+        events_path, record, stamp_path, loaded_stamp = due
+        if args.append_batch:
+            pending.setdefault(events_path, []).append((record, stamp_path, loaded_stamp))
+        else:
+            _events, before, after = append_events(events_path, [record])
+            _write_stamp_after_append(stamp_path, loaded_stamp, before, after, args)
+
+    for events_path, batch in pending.items():
+        _events, before, after = append_events(events_path, [record for record, _stamp_path, _loaded in batch])
+        for _record, stamp_path, loaded_stamp in batch:
+            _write_stamp_after_append(stamp_path, loaded_stamp, before, after, args)
 
 
 if __name__ == "__main__":
@@ -4,20 +4,44 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
-from memory_store import detect_repo_root, hash_event, memory_root_for_repo
+from memory_store import atomic_write_bytes, detect_repo_root, hash_event, hash_event_bytes, memory_root_for_repo
+
+CHECKPOINT_SCHEMA = "context-continuity-verify-checkpoint-v1"
+
+# Lines per worker task for --jobs > 1; smaller logs are checked inline.
+VERIFY_CHUNK_LINES = 2048
+
+# (line_no, start_offset, end_offset, stripped_line, newline_terminated)
+LineInfo = tuple[int, int, int, bytes, bool]
+
+# Timestamps already seen to parse; events written in the same second share one.
+_VALID_TIMESTAMPS: set[str] = set()
+_VALID_TIMESTAMPS_MAX = 4096
+
+_HASH_FIELD = b',"hash":"'
+# ,"hash":"<64 hex digits>"}
+_HASH_TAIL_LEN = len(_HASH_FIELD) + 64 + 2
 
 
 def parse_iso8601(value: str) -> bool:
-    try:
-        datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value in _VALID_TIMESTAMPS:
         return True
+    try:
+        datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
     except Exception:
         return False
+    if len(_VALID_TIMESTAMPS) < _VALID_TIMESTAMPS_MAX:
+        _VALID_TIMESTAMPS.add(value)
+    return True
 
 
 def resolve_ref(path_text: str, repo_root: Path) -> Path:
@@ -27,6 +51,161 @@ def resolve_ref(path_text: str, repo_root: Path) -> Path:
     return (repo_root / raw).resolve()
 
 
+def checkpoint_path(events_path: Path) -> Path:
+    return events_path.with_name(events_path.name + ".verified")
+
+
+def _load_checkpoint(path: Path, f: BinaryIO) -> dict[str, Any] | None:
+    """Return the saved checkpoint if it still describes a prefix of the open events file.
+
+    The checkpointed line is re-read and must carry the recorded seq and hash, and
+    the file must be the same inode (repair_events_chain replaces it).
+    """
+    try:
+        ckpt = json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(ckpt, dict) or ckpt.get("schema") != CHECKPOINT_SCHEMA:
+        return None
+    st = os.fstat(f.fileno())
+    start, end = ckpt.get("line_start"), ckpt.get("offset")
+    if ckpt.get("inode") != st.st_ino or not isinstance(start, int) or not isinstance(end, int):
+        return None
+    if not 0 <= start < end <= st.st_size:
+        return None
+    if not all(isinstance(ckpt.get(key), int) for key in ("line_no", "event_count", "warning_count")):
+        return None
+    f.seek(start)
+    try:
+        last = json.loads(f.read(end - start))
+    except ValueError:
+        return None
+    if not isinstance(last, dict) or last.get("seq") != ckpt.get("seq") or last.get("hash") != ckpt.get("hash"):
+        return None
+    return ckpt
+
+
+def _save_checkpoint(path: Path, ckpt: dict[str, Any]) -> None:
+    """Best effort: the checkpoint is only a cache, so a read-only store just skips it."""
+    try:
+        atomic_write_bytes(path, (json.dumps(ckpt, separators=(",", ":")) + "\n").encode("utf-8"))
+    except OSError:
+        pass
+
+
+def _read_lines(f: BinaryIO, line_no: int, offset: int) -> Iterator[LineInfo]:
+    """Yield (line_no, start, end, stripped_line, newline_terminated) for non-blank lines."""
+    for line_no, raw_line in enumerate(f, start=line_no):
+        start = offset
+        offset += len(raw_line)
+        line = raw_line.strip()
+        if line:
+            yield line_no, start, offset, line, raw_line.endswith(b"\n")
+
+
+def _check_line(
+    line_no: int,
+    line: bytes,
+    repo_root: Path,
+    ref_status: dict[str, tuple[Path, bool]],
+) -> dict[str, Any]:
+    """Checks that need nothing but this line: parse, schema, timestamp, hash and refs.
+
+    `ref_status` caches (resolved path, exists) per ref string: logs mention the same
+    few paths over and over, so each is resolved and stat'ed once.
+    """
+    check: dict[str, Any] = {"fatal": None}
+    try:
+        # Stdlib, not orjson: verification must parse exactly what stable_json wrote
+        # (NaN/Infinity, integers wider than 64 bits) to re-hash it byte for byte.
+        event = json.loads(line)
+    except ValueError as e:
+        check["fatal"] = f"Line {line_no}: invalid JSON ({e})."
+        return check
+    if not isinstance(event, dict):
+        check["fatal"] = f"Line {line_no}: event must be a JSON object."
+        return check
+
+    schema = event.get("schema")
+    check["schema_warning"] = (
+        f"Line {line_no}: unexpected schema '{schema}'." if schema != "context-continuity-event-v1" else None
+    )
+    check["seq"] = event.get("seq")
+
+    event_id = event.get("event_id")
+    check["event_id"] = event_id if isinstance(event_id, str) and event_id.strip() else None
+
+    ts = event.get("timestamp")
+    check["timestamp_error"] = (
+        f"Line {line_no}: invalid timestamp '{ts}'." if not isinstance(ts, str) or not parse_iso8601(ts) else None
+    )
+    check["prev_hash"] = str(event.get("prev_hash") or "")
+
+    current_hash = event.get("hash")
+    check["hash"] = None
+    check["hash_error"] = None
+    if not isinstance(current_hash, str) or not current_hash.strip():
+        check["hash_error"] = f"Line {line_no}: missing hash."
+    else:
+        computed = ""
+        cut = line.rfind(_HASH_FIELD)
+        if cut > 0 and len(line) - cut == _HASH_TAIL_LEN:
+            # encode_event layout: the hashed canonical bytes with the hash
+            # appended as the last key, so hash the line minus that field.
+            computed = hash_event_bytes(line[:cut] + b"}")
+        if computed != current_hash:
+            # Other layouts (e.g. key-sorted lines from older writers):
+            # re-canonicalize the event minus its hash field, without copying it.
+            del event["hash"]
+            computed = hash_event(event)
+            event["hash"] = current_hash
+        if computed != current_hash:
+            check["hash_error"] = f"Line {line_no}: hash mismatch (expected computed '{computed}')."
+        check["hash"] = current_hash
+
+    ref_warnings: list[str] = []
+    for ref_key in ("paths", "refs"):
+        refs = event.get(ref_key)
+        if isinstance(refs, list):
+            for ref in refs:
+                if not isinstance(ref, str) or not ref.strip():
+                    ref_warnings.append(f"Line {line_no}: invalid empty reference in '{ref_key}'.")
+                    continue
+                known = ref_status.get(ref)
+                if known is None:
+                    resolved = resolve_ref(ref, repo_root)
+                    known = ref_status[ref] = (resolved, resolved.exists())
+                resolved, exists = known
+                if not exists:
+                    ref_warnings.append(
+                        f"Line {line_no}: referenced path not found '{ref}' ({resolved})."
+                    )
+    check["ref_warnings"] = ref_warnings
+    return check
+
+
+def _check_chunk(lines: list[tuple[int, bytes]], repo_root: Path) -> list[dict[str, Any]]:
+    ref_status: dict[str, tuple[Path, bool]] = {}
+    return [_check_line(line_no, line, repo_root, ref_status) for line_no, line in lines]
+
+
+def _check_parallel(lines: list[LineInfo], repo_root: Path, jobs: int) -> list[dict[str, Any]] | None:
+    """Run `_check_line` over worker processes; None when a pool is not worth it or unavailable."""
+    if len(lines) <= VERIFY_CHUNK_LINES:
+        return None
+    chunks = [
+        [(info[0], info[3]) for info in lines[i : i + VERIFY_CHUNK_LINES]]
+        for i in range(0, len(lines), VERIFY_CHUNK_LINES)
+    ]
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parts = list(pool.map(_check_chunk, chunks, itertools.repeat(repo_root)))
+    except (OSError, RuntimeError):
+        # No usable process pool (sandboxed or restricted host); check inline.
+        return None
+    return [check for part in parts for check in part]
+
+
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--repo", default=".", help="Repo directory (defaults to cwd).")
@@ -36,6 +215,23 @@ def main() -> None:
         help="Optional path to events file. Defaults to memory_root/events/events.jsonl.",
     )
     ap.add_argument("--strict", action="store_true", help="Treat warnings as failures.")
+    ap.add_argument(
+        "--full",
+        action="store_true",
+        help=(
+            "Re-verify the whole log instead of resuming after the last clean run's checkpoint "
+            "(also rechecks event_id uniqueness and references of already-verified events)."
+        ),
+    )
+    ap.add_argument(
+        "--jobs",
+        default=1,
+        type=int,
+        help=(
+            "Worker processes for the per-event checks (parse, hash, timestamp, references); "
+            "seq, event_id uniqueness and the prev_hash chain are always checked in order."
+        ),
+    )
     args = ap.parse_args()
 
     repo_root = detect_repo_root(Path(args.repo).expanduser())
@@ -48,6 +244,7 @@ def main() -> None:
 
     errors: list[str] = []
     warnings: list[str] = []
+    earlier_warnings = 0
 
     if not events_path.exists():
         errors.append(f"Events file missing: {events_path}")
@@ -56,27 +253,49 @@ def main() -> None:
         previous_seq = 0
         seen_ids: set[str] = set()
         event_count = 0
+        ckpt_file = checkpoint_path(events_path)
+        resume_point: dict[str, Any] | None = None
 
-        with events_path.open("r", encoding="utf-8") as f:
-            for line_no, raw_line in enumerate(f, start=1):
-                line = raw_line.strip()
-                if not line:
-                    continue
+        with events_path.open("rb") as f:
+            ckpt = None if args.full else _load_checkpoint(ckpt_file, f)
+            if ckpt is not None:
+                # Everything up to the checkpoint verified clean last time: resume the chain there.
+                previous_hash = ckpt["hash"]
+                previous_seq = ckpt["seq"]
+                first_line = ckpt["line_no"] + 1
+                earlier_events = ckpt["event_count"]
+                earlier_warnings = ckpt["warning_count"]
+                offset = ckpt["offset"]
+                f.seek(offset)
+            else:
+                first_line = 1
+                earlier_events = earlier_warnings = 0
+                offset = 0
+                f.seek(0)
+
+            lines: Iterable[LineInfo] = _read_lines(f, first_line, offset)
+            checks = None
+            if args.jobs > 1:
+                lines = list(lines)
+                checks = _check_parallel(lines, repo_root, args.jobs)
+            if checks is None:
+                ref_status: dict[str, tuple[Path, bool]] = {}
+                pairs = ((info, _check_line(info[0], info[3], repo_root, ref_status)) for info in lines)
+            else:
+                pairs = zip(lines, checks)
+
+            # Per-line results are merged in file order; seq, event_id uniqueness and the
+            # prev_hash chain depend on earlier lines and are checked here.
+            for (line_no, line_start, line_end, _line, complete), check in pairs:
                 event_count += 1
-                try:
-                    event = json.loads(line)
-                except json.JSONDecodeError as e:
-                    errors.append(f"Line {line_no}: invalid JSON ({e}).")
-                    continue
-                if not isinstance(event, dict):
-                    errors.append(f"Line {line_no}: event must be a JSON object.")
+                if check["fatal"]:
+                    errors.append(check["fatal"])
                     continue
 
-                schema = event.get("schema")
-                if schema != "context-continuity-event-v1":
-                    warnings.append(f"Line {line_no}: unexpected schema '{schema}'.")
+                if check["schema_warning"]:
+                    warnings.append(check["schema_warning"])
 
-                seq = event.get("seq")
+                seq = check["seq"]
                 if not isinstance(seq, int) or seq <= 0:
                     errors.append(f"Line {line_no}: invalid seq '{seq}'.")
                 elif seq != previous_seq + 1:
@@ -85,19 +304,18 @@ def main() -> None:
                     )
                 previous_seq = seq if isinstance(seq, int) else previous_seq
 
-                event_id = event.get("event_id")
-                if not isinstance(event_id, str) or not event_id.strip():
+                event_id = check["event_id"]
+                if event_id is None:
                     errors.append(f"Line {line_no}: missing/invalid event_id.")
                 elif event_id in seen_ids:
                     errors.append(f"Line {line_no}: duplicate event_id '{event_id}'.")
                 else:
                     seen_ids.add(event_id)
 
-                ts = event.get("timestamp")
-                if not isinstance(ts, str) or not parse_iso8601(ts):
-                    errors.append(f"Line {line_no}: invalid timestamp '{ts}'.")
+                if check["timestamp_error"]:
+                    errors.append(check["timestamp_error"])
 
-                prev_hash = str(event.get("prev_hash") or "")
+                prev_hash = check["prev_hash"]
                 if previous_hash and prev_hash != previous_hash:
                     errors.append(
                         f"Line {line_no}: prev_hash mismatch, expected '{previous_hash}' got '{prev_hash}'."
@@ -107,37 +325,42 @@ def main() -> None:
                         f"Line {line_no}: first event has prev_hash set ('{prev_hash}')."
                     )
 
-                current_hash = event.get("hash")
-                if not isinstance(current_hash, str) or not current_hash.strip():
-                    errors.append(f"Line {line_no}: missing hash.")
-                else:
-                    check_payload: dict[str, Any] = dict(event)
-                    check_payload.pop("hash", None)
-                    computed = hash_event(check_payload)
-                    if computed != current_hash:
-                        errors.append(
-                            f"Line {line_no}: hash mismatch (expected computed '{computed}')."
-                        )
-                    previous_hash = current_hash
-
-                for ref_key in ("paths", "refs"):
-                    refs = event.get(ref_key)
-                    if isinstance(refs, list):
-                        for ref in refs:
-                            if not isinstance(ref, str) or not ref.strip():
-                                warnings.append(
-                                    f"Line {line_no}: invalid empty reference in '{ref_key}'."
-                                )
-                                continue
-                            resolved = resolve_ref(ref, repo_root)
-                            if not resolved.exists():
-                                warnings.append(
-                                    f"Line {line_no}: referenced path not found '{ref}' ({resolved})."
-                                )
+                if check["hash_error"]:
+                    errors.append(check["hash_error"])
+                if check["hash"] is not None:
+                    previous_hash = check["hash"]
+
+                warnings.extend(check["ref_warnings"])
+
+                if complete:
+                    resume_point = {
+                        "line_no": line_no,
+                        "line_start": line_start,
+                        "offset": line_end,
+                        "seq": previous_seq,
+                        "hash": previous_hash,
+                    }
+
+            if not errors and resume_point is not None:
+                _save_checkpoint(
+                    ckpt_file,
+                    {
+                        "schema": CHECKPOINT_SCHEMA,
+                        "inode": os.fstat(f.fileno()).st_ino,
+                        "event_count": earlier_events + event_count,
+                        "warning_count": earlier_warnings + len(warnings),
+                        **resume_point,
+                    },
+                )
 
         print(f"repo_root: {repo_root}")
         print(f"memory_root: {mem_root}")
         print(f"events_file: {events_path}")
+        if ckpt is not None:
+            print(
+                f"checkpoint: resumed after line {ckpt['line_no']} ({earlier_events} events, "
+                f"{earlier_warnings} warnings verified earlier; --full rechecks them)"
+            )
         print(f"events_checked: {event_count}")
 
     if errors:
@@ -151,7 +374,7 @@ def main() -> None:
 
     if errors:
         raise SystemExit(2)
-    if warnings and args.strict:
+    if (warnings or earlier_warnings) and args.strict:
         raise SystemExit(3)
     print("status: ok")
 